@@ -1,21 +1,17 @@
 """Run tests for users service"""
 import os
-import unittest
+import pytest
 from users_service import COV
 
 def test():
     """Runs the unit tests without test coverage."""
-    tests = unittest.TestLoader().discover('users_service/tests', pattern='test*.py')
-    result = unittest.TextTestRunner(verbosity=2).run(tests)
-    if result.wasSuccessful():
+    if pytest.main(['-v', 'users_service/tests']) == 0:
         return 0
     return 1
 
 def cov():
     """Runs the unit tests with coverage."""
-    tests = unittest.TestLoader().discover('users_service/tests')
-    result = unittest.TextTestRunner(verbosity=2).run(tests)
-    if result.wasSuccessful():
+    if pytest.main(['-v', 'users_service/tests']) == 0:
         COV.stop()
         COV.save()
         print('Coverage Summary:')
@@ -2,7 +2,8 @@
 """Init users service"""
 import unittest
 import coverage
-from flask import Flask
+import orjson
+from flask import Flask, Response
 from flask_restful import Api
 from flask_bcrypt import Bcrypt
 from flask_marshmallow import Marshmallow
@@ -25,6 +26,22 @@ APP = Flask(__name__)
 CORS(APP, supports_credentials=True)
 
 API = Api(APP)
+
+
+def json_response(obj, code):
+    """Build json response from object or already encoded body."""
+    body = obj if isinstance(obj, bytes) else orjson.dumps(obj)
+    return Response(body, status=code, mimetype='application/json')
+
+
+@API.representation('application/json')
+def output_json(data, code, headers=None):
+    """Serialize resource responses with orjson."""
+    resp = json_response(data, code)
+    resp.headers.extend(headers or {})
+    return resp
+
+
 JWT = JWTManager(APP)
 
 MA = Marshmallow(APP)
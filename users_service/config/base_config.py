@@ -1,5 +1,6 @@
 """Base configuration for users service"""
 
+import datetime
 import os
 BASEDIR = os.path.abspath(os.path.dirname(__file__))
 
@@ -9,3 +10,7 @@ class Configuration:
     TESTING = False
     BCRYPT_LOG_ROUNDS = 13
     SQLALCHEMY_TRACK_MODIFICATIONS = True
+    # Session cookie is signed only at login, so users are logged out
+    # PERMANENT_SESSION_LIFETIME after login however active they are.
+    PERMANENT_SESSION_LIFETIME = datetime.timedelta(days=31)
+    SESSION_REFRESH_EACH_REQUEST = False
@@ -11,3 +11,4 @@ class TestConfiguration(Configuration):
     BCRYPT_LOG_ROUNDS = 4
     SQLALCHEMY_DATABASE_URI = '{}{}_test'.format(POSTGRES_LOCAL_BASE, DATABASE_NAME)
     PRESERVE_CONTEXT_ON_EXCEPTION = False
+    SESSION_COOKIE_DOMAIN = None
@@ -1,13 +1,16 @@
 """Model for users service."""
 import datetime
 from flask_security import UserMixin
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, bindparam
+from sqlalchemy.ext import baked
 from sqlalchemy.orm import backref, relationship
 from sqlalchemy_utils import EmailType
 from itsdangerous import SignatureExpired, TimedJSONWebSignatureSerializer as Serializer
 from users_service import APP, BCRYPT
 from users_service.db import DB
 
+BAKERY = baked.bakery()
+
 
 class User(DB.Model, UserMixin):
     """Implementation of Users entity."""
@@ -38,15 +41,27 @@ class User(DB.Model, UserMixin):
             return None
         return User.query.get(user_id)
 
+    @staticmethod
+    def get_by_email(email):
+        """Find user by email with cached compiled query"""
+        query = BAKERY(lambda session: session.query(User))
+        query += lambda user_query: user_query.filter(User.email == bindparam('email'))
+        return query(DB.session()).params(email=email).first()
+
+    @staticmethod
+    def hash_password(password):
+        """Hash password with configured bcrypt rounds"""
+        return BCRYPT.generate_password_hash(
+            password, APP.config.get('BCRYPT_LOG_ROUNDS')
+        ).decode()
+
     def __init__(self, email, first_name, last_name, role_id, password=None, google_id=None):
         self.email = email
         self.first_name = first_name
         self.last_name = last_name
         self.google_id = google_id
         if password:
-            self.password = BCRYPT.generate_password_hash(
-                password, APP.config.get('BCRYPT_LOG_ROUNDS')
-            ).decode()
+            self.password = User.hash_password(password)
         self.role_id = role_id
 
 
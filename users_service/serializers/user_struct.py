@@ -0,0 +1,51 @@
+"""Msgspec structs for Users service."""
+import datetime
+from typing import Annotated, Optional
+import msgspec
+
+Email = Annotated[str, msgspec.Meta(pattern=r'^[^@\s]+@[^@\s]+\.[^@\s]+$')]
+
+
+class UserIn(msgspec.Struct):  # pylint: disable=too-few-public-methods
+    """Registration payload."""
+    email: Email
+    first_name: str
+    last_name: str
+    password: Optional[str] = None
+    google_id: Optional[int] = None
+
+
+class RoleOut(msgspec.Struct):  # pylint: disable=too-few-public-methods
+    """Role representation."""
+    id: int
+    role_name: str
+    role_description: Optional[str]
+
+
+class UserOut(msgspec.Struct):  # pylint: disable=too-few-public-methods
+    """User representation without password."""
+    user_id: int
+    email: str
+    first_name: str
+    last_name: str
+    google_id: Optional[int]
+    role_id: Optional[int]
+    role: Optional[RoleOut]
+    create_date: str
+    update_date: str
+
+    @classmethod
+    def from_model(cls, user):
+        """Build struct from User model."""
+        role = user.role
+        return cls(
+            user_id=user.user_id,
+            email=user.email,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            google_id=int(user.google_id) if user.google_id else None,
+            role_id=user.role_id,
+            role=RoleOut(role.id, role.role_name, role.role_description) if role else None,
+            create_date=user.create_date.replace(tzinfo=datetime.timezone.utc).isoformat(),
+            update_date=user.update_date.replace(tzinfo=datetime.timezone.utc).isoformat()
+        )
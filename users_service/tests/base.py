@@ -1,23 +1,36 @@
+#pylint: disable=cyclic-import
 """Base test case"""
 from flask_testing import TestCase
 
 from users_service.db import APP, DB
 
+TEST_CONFIG = 'users_service.config.test_config.TestConfiguration'
+
 
 class BaseTestCase(TestCase):
     """ Base Tests """
 
     def create_app(self): #pylint: disable=no-self-use
         """Create app and configure"""
-        APP.config.from_object('users_service.config.test_config.TestConfiguration')
+        APP.config.from_object(TEST_CONFIG)
         return APP
 
-    def setUp(self): #pylint: disable=no-self-use
-        """Create tables"""
+    @classmethod
+    def setUpClass(cls):
+        """Create missing tables, sharing schema with pytest fixtures"""
+        super().setUpClass()
+        APP.config.from_object(TEST_CONFIG)
         DB.create_all()
-        DB.session.commit()
 
     def tearDown(self): #pylint: disable=no-self-use
-        """Drop tables"""
+        """Delete rows left by test"""
+        DB.session.remove()
+        for table in reversed(DB.metadata.sorted_tables):
+            DB.session.execute(table.delete())
+        DB.session.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Release session, leaving schema for later tests"""
         DB.session.remove()
-        DB.drop_all()
+        super().tearDownClass()
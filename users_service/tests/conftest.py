@@ -0,0 +1,110 @@
+"""Shared test fixtures"""
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from users_service import BCRYPT
+from users_service.db import APP, DB
+from users_service.models.users import Role, User
+
+
+@pytest.fixture(scope='session')
+def app():
+    """Configure app for testing"""
+    APP.config.from_object('users_service.config.test_config.TestConfiguration')
+    return APP
+
+
+@pytest.fixture(scope='session', autouse=True)
+def app_context(app): #pylint: disable=redefined-outer-name
+    """Push app context once per test session"""
+    context = app.app_context()
+    context.push()
+    yield context
+    context.pop()
+
+
+@pytest.fixture(scope='session')
+def session_client(app): #pylint: disable=redefined-outer-name
+    """Test client shared by the session"""
+    return app.test_client()
+
+
+@pytest.fixture
+def client(session_client): #pylint: disable=redefined-outer-name
+    """Shared test client without cookies from previous tests"""
+    session_client.cookie_jar.clear()
+    return session_client
+
+
+@pytest.fixture(scope='session')
+def app_db(app): #pylint: disable=redefined-outer-name, unused-argument
+    """Create tables once per test session"""
+    DB.create_all()
+    yield DB
+    DB.session.remove()
+    DB.drop_all()
+
+
+@pytest.fixture
+def db_session(app_db): #pylint: disable=redefined-outer-name
+    """Run test inside a savepoint rolled back on teardown"""
+    connection = app_db.engine.connect()
+    transaction = connection.begin()
+    session = app_db.create_scoped_session(options={'bind': connection, 'binds': {}})
+    session.begin_nested()
+
+    @event.listens_for(session(), 'after_transaction_end')
+    def restart_savepoint(sess, trans): #pylint: disable=unused-variable
+        """Reopen savepoint after views commit or roll back"""
+        if trans.nested and not trans._parent.nested: #pylint: disable=protected-access
+            sess.expire_all()
+            sess.begin_nested()
+
+    app_session = app_db.session
+    app_db.session = session
+    yield session
+    app_db.session = app_session
+    session.remove()
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture(scope='session')
+def password_hash(app): #pylint: disable=redefined-outer-name
+    """Hash of the common test password computed once"""
+    return BCRYPT.generate_password_hash(
+        '123456', app.config.get('BCRYPT_LOG_ROUNDS')
+    ).decode()
+
+
+@pytest.fixture
+def roles(db_session): #pylint: disable=redefined-outer-name
+    """Insert user and admin roles referenced by views"""
+    db_session.execute(Role.__table__.insert(), [
+        {'id': 1, 'role_name': 'user', 'role_description': 'Regular user'},
+        {'id': 2, 'role_name': 'admin', 'role_description': 'Administrator'}
+    ])
+    db_session.commit()
+
+
+@pytest.fixture
+def insert_users(db_session, password_hash): #pylint: disable=redefined-outer-name
+    """Bulk insert users having the common test password"""
+    def insert(*users):
+        result = db_session.execute(
+            User.__table__.insert(),
+            [dict(user, password=password_hash) for user in users]
+        )
+        db_session.commit()
+        return result
+    return insert
+
+
+@pytest.fixture
+def registered_user(insert_users, roles): #pylint: disable=redefined-outer-name, unused-argument
+    """Insert registered user and return access token for it"""
+    result = insert_users(
+        {'email': 'joe@gmail.com', 'first_name': 'joe', 'last_name': 'doe', 'role_id': 1}
+    )
+    return create_access_token(identity=result.inserted_primary_key[0])
@@ -1,208 +1,197 @@
 """Test auth view"""
-import time
-import json
-import unittest
+from datetime import datetime, timedelta
 
-from users_service.db import DB
-from users_service.models.users import User
-from users_service.tests.base import BaseTestCase
+import msgspec
+import orjson
+import pytest
+from freezegun import freeze_time
 
+from users_service.serializers.user_struct import UserOut
+from users_service.views.auth_view import AUTH_TOKEN_KEY
 
-def register_user(self, email, password, first_name, last_name):
+
+class RespMsg(msgspec.Struct):
+    """Response fields checked by tests"""
+    message: str = ''
+    error: str = ''
+
+
+RESP_DECODER = msgspec.json.Decoder(RespMsg)
+USER_DECODER = msgspec.json.Decoder(UserOut)
+
+
+def register_user(client, email, password, first_name, last_name):
     """Register user"""
-    return self.client.post(
-        '/auth/register',
-        data=json.dumps(dict(
-            email=email,
-            password=password,
-            first_name=first_name,
-            last_name=last_name
-        )),
+    return client.post(
+        '/users/register',
+        data=orjson.dumps({
+            'email': email,
+            'password': password,
+            'first_name': first_name,
+            'last_name': last_name
+        }),
         content_type='application/json',
     )
 
-def login_user(self, email, password):
+def login_user(client, email, password):
     """Login user"""
-    return self.client.post(
-        '/auth/login',
-        data=json.dumps(dict(
-            email=email,
-            password=password
-        )),
+    return client.post(
+        '/users/login',
+        data=orjson.dumps({
+            'email': email,
+            'password': password
+        }),
+        content_type='application/json',
+    )
+
+def session_auth_token(client):
+    """Read auth token stored in client session"""
+    with client.session_transaction() as sess:
+        return sess.get(AUTH_TOKEN_KEY)
+
+
+@pytest.fixture
+def registered_token(client, registered_user): #pylint: disable=unused-argument
+    """Log registered user in and return session auth token"""
+    login_user(client, 'joe@gmail.com', '123456')
+    return session_auth_token(client)
+
+
+def test_registration(client, roles): #pylint: disable=unused-argument
+    """ Test for user registration """
+    response = register_user(client, 'joe@gmail.com', '123456', 'joe', 'doe')
+    data = RESP_DECODER.decode(response.data)
+    assert data.message == 'Successfully registered.'
+    assert session_auth_token(client)
+    assert response.content_type == 'application/json'
+    assert response.status_code == 200
+
+
+def test_registered_with_already_registered_user(client, insert_users):
+    """ Test registration with already registered email"""
+    insert_users({'email': 'joe@gmail.com', 'first_name': 'joe', 'last_name': 'doe'})
+    response = register_user(client, 'joe@gmail.com', '123456', 'joe', 'doe')
+    data = RESP_DECODER.decode(response.data)
+    assert data.error == 'Already exists.'
+    assert session_auth_token(client) is None
+    assert response.content_type == 'application/json'
+    assert response.status_code == 400
+
+
+def test_duplicate_registration(client, roles): #pylint: disable=unused-argument
+    """ Test registering the same email twice"""
+    register_user(client, 'joe@gmail.com', '123456', 'joe', 'doe')
+    response = register_user(client, 'joe@gmail.com', '654321', 'joe', 'doe')
+    data = RESP_DECODER.decode(response.data)
+    assert data.error == 'Already exists.'
+    assert response.status_code == 400
+
+
+def test_registration_without_credentials(client, roles): #pylint: disable=unused-argument
+    """ Test registration without password or google id"""
+    response = client.post(
+        '/users/register',
+        data=orjson.dumps({'email': 'joe@gmail.com', 'first_name': 'joe', 'last_name': 'doe'}),
         content_type='application/json',
     )
+    data = RESP_DECODER.decode(response.data)
+    assert data.error == 'Provide password or google_id.'
+    assert response.status_code == 400
+    response = register_user(client, 'joe@gmail.com', '123456', 'joe', 'doe')
+    assert response.status_code == 200
+
+
+def test_registered_user_login(client, registered_user): #pylint: disable=unused-argument
+    """ Test for login of registered-user login """
+    response = login_user(client, 'joe@gmail.com', '123456')
+    data = RESP_DECODER.decode(response.data)
+    assert data.message == 'Successfully logged in.'
+    assert session_auth_token(client)
+    assert response.content_type == 'application/json'
+    assert response.status_code == 200
+
+
+def test_registered_user_wrong_password(client, registered_user): #pylint: disable=unused-argument
+    """ Test for login of registered user with wrong password """
+    response = login_user(client, 'joe@gmail.com', '654321')
+    data = RESP_DECODER.decode(response.data)
+    assert data.error == 'Wrong password.'
+    assert session_auth_token(client) is None
+    assert response.status_code == 400
+
+
+def test_non_registered_user_login(client, db_session): #pylint: disable=unused-argument
+    """ Test for login of non-registered user """
+    response = login_user(client, 'joe@gmail.com', '123456')
+    data = RESP_DECODER.decode(response.data)
+    assert data.error == 'No user with this email.'
+    assert response.content_type == 'application/json'
+    assert response.status_code == 400
+
+
+def test_user_profile(client, registered_user):
+    """ Test for user profile """
+    with client.session_transaction() as sess:
+        sess[AUTH_TOKEN_KEY] = registered_user
+    response = client.get('/users/profile')
+    data = USER_DECODER.decode(response.data)
+    assert data.email == 'joe@gmail.com'
+    assert data.role is not None
+    assert data.role.role_name == 'user'
+    assert response.status_code == 200
+
+
+def test_profile_google_id_round_trip(client, registered_user):
+    """ Test 21-digit google id keeps every digit through profile"""
+    google_id = 110169484474386276334
+    with client.session_transaction() as sess:
+        sess[AUTH_TOKEN_KEY] = registered_user
+    response = client.put(
+        '/users/profile',
+        data=b'{"google_id": %d}' % google_id,
+        content_type='application/json',
+    )
+    assert RESP_DECODER.decode(response.data).message == 'Successfully updated.'
+    data = USER_DECODER.decode(client.get('/users/profile').data)
+    assert data.google_id == google_id
+
+
+def test_user_profile_without_token(client):
+    """ Test for user profile without auth token in session"""
+    response = client.get('/users/profile')
+    data = RESP_DECODER.decode(response.data)
+    assert data.error == 'Provide a valid auth token.'
+    assert response.status_code == 401
+
+
+def test_valid_logout(client, registered_token): #pylint: disable=redefined-outer-name
+    """ Test for logout of logged in user """
+    assert registered_token
+    response = client.post('/users/logout')
+    data = RESP_DECODER.decode(response.data)
+    assert data.message == 'Successfully logged out.'
+    assert session_auth_token(client) is None
+    assert response.status_code == 200
+
+
+def test_invalid_logout(client, app, registered_token): #pylint: disable=redefined-outer-name, unused-argument
+    """ Testing profile access after the session expires """
+    lifetime = app.config['PERMANENT_SESSION_LIFETIME']
+    with freeze_time(datetime.utcnow() + lifetime + timedelta(seconds=60)):
+        response = client.get('/users/profile')
+    data = RESP_DECODER.decode(response.data)
+    assert data.error == 'Provide a valid auth token.'
+    assert response.status_code == 401
 
 
-class TestAuthBlueprint(BaseTestCase):
-    """Test auth view"""
-    def test_registration(self):
-        """ Test for user registration """
-        with self.client:
-            response = register_user(self, 'joe@gmail.com', '123456', 'joe', 'doe')
-            data = json.loads(response.data.decode())
-            self.assertTrue(data['status'] == 'success')
-            self.assertTrue(data['message'] == 'Successfully registered.')
-            self.assertTrue(data['auth_token'])
-            self.assertTrue(response.content_type == 'application/json')
-            self.assertEqual(response.status_code, 201)
-
-    def test_registered_with_already_registered_user(self):
-        """ Test registration with already registered email"""
-        user = User(
-            email='joe@gmail.com',
-            password='test',
-            first_name='joe',
-            last_name='doe'
-        )
-        DB.session.add(user)
-        DB.session.commit()
-        with self.client:
-            response = register_user(self, 'joe@gmail.com', '123456', 'joe', 'doe')
-            data = json.loads(response.data.decode())
-            self.assertTrue(data['status'] == 'fail')
-            self.assertTrue(
-                data['message'] == 'User already exists. Please Log in.')
-            self.assertTrue(response.content_type == 'application/json')
-            self.assertEqual(response.status_code, 202)
-
-    def test_registered_user_login(self):
-        """ Test for login of registered-user login """
-        with self.client:
-            # user registration
-            resp_register = register_user(self, 'joe@gmail.com', '123456', 'joe', 'doe')
-            data_register = json.loads(resp_register.data.decode())
-            self.assertTrue(data_register['status'] == 'success')
-            self.assertTrue(
-                data_register['message'] == 'Successfully registered.'
-            )
-            self.assertTrue(data_register['auth_token'])
-            self.assertTrue(resp_register.content_type == 'application/json')
-            self.assertEqual(resp_register.status_code, 201)
-            # registered user login
-            response = login_user(self, 'joe@gmail.com', '123456')
-            data = json.loads(response.data.decode())
-            self.assertTrue(data['status'] == 'success')
-            self.assertTrue(data['message'] == 'Successfully logged in.')
-            self.assertTrue(data['auth_token'])
-            self.assertTrue(response.content_type == 'application/json')
-            self.assertEqual(response.status_code, 201)
-
-    def test_non_registered_user_login(self):
-        """ Test for login of non-registered user """
-        with self.client:
-            response = login_user(self, 'joe@gmail.com', '123456')
-            data = json.loads(response.data.decode())
-            self.assertTrue(data['status'] == 'fail')
-            self.assertTrue(data['message'] == 'User does not exist.')
-            self.assertTrue(response.content_type == 'application/json')
-            self.assertEqual(response.status_code, 404)
-
-    def test_user_status(self):
-        """ Test for user status """
-        with self.client:
-            resp_register = register_user(self, 'joe@gmail.com', '123456', 'joe', 'doe')
-            response = self.client.get(
-                '/auth/status',
-                headers=dict(
-                    Authorization='Bearer ' + json.loads(
-                        resp_register.data.decode()
-                    )['auth_token']
-                )
-            )
-            data = json.loads(response.data.decode())
-            self.assertTrue(data['status'] == 'success')
-            self.assertTrue(data['data'] is not None)
-            self.assertTrue(data['data']['email'] == 'joe@gmail.com')
-            self.assertTrue(data['data']['admin'] is '1' or '0') #pylint: disable=literal-comparison
-            self.assertEqual(response.status_code, 200)
-
-    def test_user_status_malformed_bearer_token(self):
-        """ Test for user status with malformed bearer token"""
-        with self.client:
-            resp_register = register_user(self, 'joe@gmail.com', '123456', 'joe', 'doe')
-            response = self.client.get(
-                '/auth/status',
-                headers=dict(
-                    Authorization='Bearer' + json.loads(
-                        resp_register.data.decode()
-                    )['auth_token']
-                )
-            )
-            data = json.loads(response.data.decode())
-            self.assertTrue(data['status'] == 'fail')
-            self.assertTrue(data['message'] == 'Bearer token malformed.')
-            self.assertEqual(response.status_code, 401)
-
-    def test_valid_logout(self):
-        """ Test for logout before token expires """
-        with self.client:
-            # user registration
-            resp_register = register_user(self, 'joe@gmail.com', '123456', 'joe', 'doe')
-            data_register = json.loads(resp_register.data.decode())
-            self.assertTrue(data_register['status'] == 'success')
-            self.assertTrue(
-                data_register['message'] == 'Successfully registered.')
-            self.assertTrue(data_register['auth_token'])
-            self.assertTrue(resp_register.content_type == 'application/json')
-            self.assertEqual(resp_register.status_code, 201)
-            # user login
-            resp_login = login_user(self, 'joe@gmail.com', '123456')
-            data_login = json.loads(resp_login.data.decode())
-            self.assertTrue(data_login['status'] == 'success')
-            self.assertTrue(data_login['message'] == 'Successfully logged in.')
-            self.assertTrue(data_login['auth_token'])
-            self.assertTrue(resp_login.content_type == 'application/json')
-            self.assertEqual(resp_login.status_code, 201)
-            # valid token logout
-            response = self.client.post(
-                '/auth/logout',
-                headers=dict(
-                    Authorization='Bearer ' + json.loads(
-                        resp_login.data.decode()
-                    )['auth_token']
-                )
-            )
-            data = json.loads(response.data.decode())
-            self.assertTrue(data['status'] == 'success')
-            self.assertTrue(data['message'] == 'Successfully logged out.')
-            self.assertEqual(response.status_code, 200)
-
-    def test_invalid_logout(self):
-        """ Testing logout after the token expires """
-        with self.client:
-            # user registration
-            resp_register = register_user(self, 'joe@gmail.com', '123456', 'joe', 'doe')
-            data_register = json.loads(resp_register.data.decode())
-            self.assertTrue(data_register['status'] == 'success')
-            self.assertTrue(
-                data_register['message'] == 'Successfully registered.')
-            self.assertTrue(data_register['auth_token'])
-            self.assertTrue(resp_register.content_type == 'application/json')
-            self.assertEqual(resp_register.status_code, 201)
-            # user login
-            resp_login = login_user(self, 'joe@gmail.com', '123456')
-            data_login = json.loads(resp_login.data.decode())
-            self.assertTrue(data_login['status'] == 'success')
-            self.assertTrue(data_login['message'] == 'Successfully logged in.')
-            self.assertTrue(data_login['auth_token'])
-            self.assertTrue(resp_login.content_type == 'application/json')
-            self.assertEqual(resp_login.status_code, 201)
-            # invalid token logout (signature expired)
-            time.sleep(51)
-            response = self.client.post(
-                '/auth/logout',
-                headers=dict(
-                    Authorization='Bearer ' + json.loads(
-                        resp_login.data.decode()
-                    )['auth_token']
-                )
-            )
-            data = json.loads(response.data.decode())
-            self.assertTrue(data['status'] == 'fail')
-            self.assertTrue(
-                data['message'] == 'Signature expired. Please log in again.')
-            self.assertEqual(response.status_code, 401)
-
-
-if __name__ == '__main__':
-    unittest.main()
+def test_reused_session_after_logout(client, app, registered_token): #pylint: disable=redefined-outer-name, unused-argument
+    """ Test replaying session cookie saved before logout"""
+    cookie = next(c for c in client.cookie_jar if c.name == app.session_cookie_name)
+    client.post('/users/logout')
+    client.set_cookie(cookie.domain, cookie.name, cookie.value)
+    assert session_auth_token(client) == registered_token
+    response = client.get('/users/profile')
+    data = RESP_DECODER.decode(response.data)
+    assert data.error == 'Provide a valid auth token.'
+    assert response.status_code == 401
+    assert session_auth_token(client) is None
@@ -1,24 +1,90 @@
 """Authentication view"""
 import datetime
-from flask import Blueprint, jsonify, make_response, request, session
+import threading
+import time
+import msgspec
+import orjson
+from cachetools import TTLCache, cached
+from flask import Blueprint, request, session
 from flask_restful import HTTPException, Resource
 from marshmallow import fields, ValidationError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import defer, joinedload
 from flask_api import status
 from flask_jwt_extended import create_access_token, decode_token
 from webargs.flaskparser import parser
-from users_service import API, APP, BCRYPT
+from users_service import API, APP, BCRYPT, json_response
 from users_service.db import DB
 from users_service.models.users import Role, User
 from users_service.serializers.user_schema import UserSchema
+from users_service.serializers.user_struct import UserIn, UserOut
 
 AUTH_BLUEPRINT = Blueprint('users', __name__)
-USER_SCHEMA = UserSchema(strict=True)
-CREATE_USER_SCHEMA = UserSchema(strict=True, exclude=['role'])
-USER_SCHEMA_NO_PASSWD = UserSchema(strict=True, exclude=['password'])
-USERS_SCHEMA = UserSchema(strict=True, many=True, exclude=['password'])
+LOGIN_SCHEMA = UserSchema(strict=True, only=('email', 'password', 'google_id'))
+USER_DECODER = msgspec.json.Decoder(UserIn)
+USER_ENCODER = msgspec.json.Encoder()
 
 AUTH_TOKEN_KEY = 'auth_token'
+# Revoked token jti -> monotonic revocation time, oldest first.
+BLACKLIST = {}
+BLACKLIST_LOCK = threading.Lock()
+
+REGISTERED_BODY = orjson.dumps({'message': 'Successfully registered.'})
+LOGGED_IN_BODY = orjson.dumps({'message': 'Successfully logged in.'})
+LOGGED_OUT_BODY = orjson.dumps({'message': 'Successfully logged out.'})
+UPDATED_BODY = orjson.dumps({'message': 'Successfully updated.'})
+ALREADY_EXISTS_BODY = orjson.dumps({'error': 'Already exists.'})
+INVALID_URL_BODY = orjson.dumps({'error': 'Invalid url.'})
+INVALID_ARGS_BODY = orjson.dumps({'error': 'Invalid URL.'})
+WRONG_PASSWORD_BODY = orjson.dumps({'error': 'Wrong password.'})
+NO_USER_BODY = orjson.dumps({'error': 'No user with this email.'})
+NO_TOKEN_BODY = orjson.dumps({'error': 'Provide a valid auth token.'})
+NO_CREDENTIALS_BODY = orjson.dumps({'error': 'Provide password or google_id.'})
+DATABASE_ERROR_BODY = orjson.dumps({'error': 'Database error.'})
+NO_USERS_FOUND_BODY = orjson.dumps({'error': 'No user fitting criteria.'})
+NOT_ALLOWED_BODY = orjson.dumps({'error': 'Not allowed.'})
+
+
+@cached(TTLCache(maxsize=4096, ttl=30), lock=threading.Lock())
+def decode_access_token(access_token):
+    """Decode access token, reusing recently verified ones."""
+    return decode_token(access_token)
+
+
+def revoke_token(access_token):
+    """
+    Blacklist token jti.
+
+    Tokens never expire, but a session cookie holding one is rejected once
+    PERMANENT_SESSION_LIFETIME has passed since it was last signed. Cookies
+    holding the token are signed no later than logout, and session_token
+    clears replayed ones so they are never re-signed. Entries older than the
+    lifetime are dropped and the blacklist is bounded by logouts per lifetime.
+    """
+    jti = decode_access_token(access_token)['jti']
+    now = time.monotonic()
+    lifetime = APP.permanent_session_lifetime.total_seconds()
+    with BLACKLIST_LOCK:
+        while BLACKLIST:
+            oldest = next(iter(BLACKLIST))
+            if now - BLACKLIST[oldest] < lifetime:
+                break
+            del BLACKLIST[oldest]
+        BLACKLIST.pop(jti, None)
+        BLACKLIST[jti] = now
+
+
+def session_token():
+    """Return session access token if present and not revoked."""
+    access_token = session.get(AUTH_TOKEN_KEY)
+    if access_token is None:
+        return None
+    if decode_access_token(access_token)['jti'] in BLACKLIST:
+        session.clear()
+        return None
+    return access_token
+
 
 class RegisterResource(Resource):
     """
@@ -27,45 +93,36 @@ class RegisterResource(Resource):
     def post(self):
         """Post method"""
         try:
-            new_user = CREATE_USER_SCHEMA.load(request.json).data
-        except ValidationError as err:
+            new_user = USER_DECODER.decode(request.get_data())
+        except msgspec.DecodeError as err:
             APP.logger.error(err.args)
-            return jsonify(err.messages), status.HTTP_400_BAD_REQUEST
-        try:
-            user = User(
-                email=new_user['email'],
-                password=new_user['password'],
-                first_name=new_user['first_name'],
-                last_name=new_user['last_name'],
-                role_id=1
-            )
-        except KeyError:
-            user = User(
-                email=new_user['email'],
-                google_id=new_user['google_id'],
-                first_name=new_user['first_name'],
-                last_name=new_user['last_name'],
-                role_id=1
-            )
-        DB.session.add(user)
+            return json_response({'error': str(err)}, status.HTTP_400_BAD_REQUEST)
+        if new_user.password is None and new_user.google_id is None:
+            return json_response(NO_CREDENTIALS_BODY, status.HTTP_400_BAD_REQUEST)
+        insert_user = pg_insert(User.__table__).values(
+            email=new_user.email,
+            password=User.hash_password(new_user.password) if new_user.password else None,
+            google_id=new_user.google_id,
+            first_name=new_user.first_name,
+            last_name=new_user.last_name,
+            role_id=1
+        ).on_conflict_do_nothing().returning(User.user_id)
         try:
+            user = DB.session.execute(insert_user).first()
             DB.session.commit()
         except IntegrityError as err:
             APP.logger.error(err.args)
             DB.session.rollback()
-            response = {
-                'error': 'Already exists.'
-            }
-            return response, status.HTTP_400_BAD_REQUEST
+            return json_response(DATABASE_ERROR_BODY, status.HTTP_400_BAD_REQUEST)
+        if user is None:
+            return json_response(ALREADY_EXISTS_BODY, status.HTTP_400_BAD_REQUEST)
         session.permanent = True
         access_token = create_access_token(identity=user.user_id, expires_delta=False)
         session[AUTH_TOKEN_KEY] = access_token
 
-        response_obj = jsonify({
-            'message': 'Successfully registered.'
-        })
+        response_obj = json_response(REGISTERED_BODY, status.HTTP_200_OK)
         response_obj.set_cookie("admin", str(False))
-        return make_response(response_obj, status.HTTP_200_OK)
+        return response_obj
 
 
 class LoginResource(Resource):
@@ -75,20 +132,20 @@ class LoginResource(Resource):
     def post(self):
         """Post method"""
         try:
-            user_data = CREATE_USER_SCHEMA.load(request.json).data
+            payload = msgspec.json.decode(request.get_data())
+        except msgspec.DecodeError as err:
+            APP.logger.exception(err.args)
+            return json_response({'error': str(err)}, status.HTTP_400_BAD_REQUEST)
+        try:
+            user_data = LOGIN_SCHEMA.load(payload).data
         except ValidationError as err:
             APP.logger.exception(err.args)
-            return jsonify(err.messages), status.HTTP_400_BAD_REQUEST
+            return json_response(err.messages, status.HTTP_400_BAD_REQUEST)
         try:
-            user = User.query.filter_by(
-                email=user_data['email']
-            ).first()
+            user = User.get_by_email(user_data['email'])
         except (KeyError, DataError) as err:
             APP.logger.exception(err.args)
-            response_obj = {
-                'error': 'Invalid url.'
-            }
-            return response_obj, status.HTTP_404_NOT_FOUND
+            return json_response(INVALID_URL_BODY, status.HTTP_404_NOT_FOUND)
         if user:
             try:
                 check_user = BCRYPT.check_password_hash(
@@ -100,19 +157,11 @@ class LoginResource(Resource):
                 session.permanent = True
                 access_token = create_access_token(identity=user.user_id, expires_delta=False)
                 session[AUTH_TOKEN_KEY] = access_token
-                response_obj = jsonify({
-                    'message': 'Successfully logged in.'
-                })
+                response_obj = json_response(LOGGED_IN_BODY, status.HTTP_200_OK)
                 response_obj.set_cookie("admin", str(bool(user.role_id == 2)))
-                return make_response(response_obj, status.HTTP_200_OK)
-            response_obj = {
-                'error': 'Wrong password.'
-            }
-            return response_obj, status.HTTP_400_BAD_REQUEST
-        response_obj = {
-            'error': 'No user with this email.'
-        }
-        return response_obj, status.HTTP_400_BAD_REQUEST
+                return response_obj
+            return json_response(WRONG_PASSWORD_BODY, status.HTTP_400_BAD_REQUEST)
+        return json_response(NO_USER_BODY, status.HTTP_400_BAD_REQUEST)
 
 
 class ProfileResource(Resource):
@@ -121,19 +170,15 @@ class ProfileResource(Resource):
     """
     def get(self):
         """Get method"""
-        try:
-            access_token = session[AUTH_TOKEN_KEY]
-        except KeyError as err:
-            APP.logger.error(err.args)
-            response_obj = {
-                'error': 'Provide a valid auth token.'
-            }
-            return response_obj, status.HTTP_401_UNAUTHORIZED
-        user_info = decode_token(access_token)
+        access_token = session_token()
+        if access_token is None:
+            APP.logger.error('No valid auth token in session.')
+            return json_response(NO_TOKEN_BODY, status.HTTP_401_UNAUTHORIZED)
+        user_info = decode_access_token(access_token)
         user_id = user_info['identity']
         user = User.query.get(user_id)
-        response_obj = USER_SCHEMA_NO_PASSWD.dump(user).data
-        resp = make_response(jsonify(response_obj), status.HTTP_200_OK)
+        response_obj = USER_ENCODER.encode(UserOut.from_model(user))
+        resp = json_response(response_obj, status.HTTP_200_OK)
         if user.password:
             resp.set_cookie('has_passwd', str(True))
         else:
@@ -142,22 +187,16 @@ class ProfileResource(Resource):
 
     def put(self):
         """Put method"""
-        try:
-            access_token = session[AUTH_TOKEN_KEY]
-        except KeyError as err:
-            APP.logger.error(err.args)
-            response_obj = {
-                'error': 'Provide a valid auth token.'
-            }
-            return response_obj, status.HTTP_401_UNAUTHORIZED
-        user_info = decode_token(access_token)
+        access_token = session_token()
+        if access_token is None:
+            APP.logger.error('No valid auth token in session.')
+            return json_response(NO_TOKEN_BODY, status.HTTP_401_UNAUTHORIZED)
+        user_info = decode_access_token(access_token)
         user_id = user_info['identity']
         user = User.query.get(user_id)
         if user.google_id:
             password = request.json.get('password')
-            user.password = BCRYPT.generate_password_hash(
-                password, APP.config.get('BCRYPT_LOG_ROUNDS')
-            ).decode()
+            user.password = User.hash_password(password)
         else:
             user.google_id = request.json.get('google_id')
         user.update_date = datetime.datetime.now()
@@ -166,14 +205,8 @@ class ProfileResource(Resource):
         except IntegrityError as err:
             APP.logger.error(err.args)
             DB.session.rollback()
-            response = {
-                'error': 'Database error.'
-            }
-            return response, status.HTTP_400_BAD_REQUEST
-        response_obj = {
-            'message': 'Successfully updated.'
-        }
-        return response_obj, status.HTTP_200_OK
+            return json_response(DATABASE_ERROR_BODY, status.HTTP_400_BAD_REQUEST)
+        return json_response(UPDATED_BODY, status.HTTP_200_OK)
 
 
 
@@ -183,12 +216,13 @@ class LogoutResource(Resource):
     """
     def post(self):
         """Post method"""
+        access_token = session.get(AUTH_TOKEN_KEY)
+        if access_token:
+            revoke_token(access_token)
         session.clear()
-        response_obj = jsonify({
-            'message': 'Successfully logged out.'
-        })
+        response_obj = json_response(LOGGED_OUT_BODY, status.HTTP_200_OK)
         response_obj.delete_cookie('admin')
-        return make_response(response_obj, status.HTTP_200_OK)
+        return response_obj
 
 
 class UsersResource(Resource):
@@ -211,8 +245,10 @@ class UsersResource(Resource):
                 args = parser.parse(url_args, request)
             except HTTPException:
                 APP.logger.error('%s not correct URL', request.url)
-                return {"error": "Invalid URL."}, status.HTTP_400_BAD_REQUEST
-            users = User.query.filter().order_by(User.user_id)
+                return json_response(INVALID_ARGS_BODY, status.HTTP_400_BAD_REQUEST)
+            users = User.query.options(
+                defer(User.password), joinedload(User.role)
+            ).order_by(User.user_id)
 
             if 'user_id' in args:
                 users = users.filter(User.user_id.in_(args['user_id']))
@@ -226,16 +262,11 @@ class UsersResource(Resource):
                 users = users.filter(User.last_name.like('%' + args['last_name'] + '%'))
             if 'email' in args:
                 users = users.filter(User.email.like('%' + args['email'] + '%'))
-            response_obj = USERS_SCHEMA.dump(users).data
+            response_obj = [UserOut.from_model(user) for user in users]
             if not response_obj:
-                response_obj = {
-                    'error': 'No user fitting criteria.'
-                }
-            return response_obj, status.HTTP_200_OK
-        response_obj = {
-            'error': 'Not allowed.'
-        }
-        return response_obj, status.HTTP_403_FORBIDDEN
+                return json_response(NO_USERS_FOUND_BODY, status.HTTP_200_OK)
+            return json_response(USER_ENCODER.encode(response_obj), status.HTTP_200_OK)
+        return json_response(NOT_ALLOWED_BODY, status.HTTP_403_FORBIDDEN)
 
 
     def put(self):
@@ -243,7 +274,7 @@ class UsersResource(Resource):
         admin = request.cookies.get('admin')
         if admin:
             user_email = request.json.get("email")
-            user = User.query.filter_by(email=user_email).first()
+            user = User.get_by_email(user_email)
             if user:
                 user.role = Role.query.get(2)
                 user.update_date = datetime.datetime.now()
@@ -252,22 +283,10 @@ class UsersResource(Resource):
                 except IntegrityError as err:
                     APP.logger.error(err.args)
                     DB.session.rollback()
-                    response = {
-                        'error': 'Database error.'
-                    }
-                    return response, status.HTTP_400_BAD_REQUEST
-                response_obj = {
-                    'message': 'Successfully updated.'
-                }
-                return response_obj, status.HTTP_200_OK
-            response_obj = {
-                'error': 'No user with this email.'
-            }
-            return response_obj, status.HTTP_400_BAD_REQUEST
-        response_obj = {
-            'error': 'Not allowed.'
-        }
-        return response_obj, status.HTTP_403_FORBIDDEN
+                    return json_response(DATABASE_ERROR_BODY, status.HTTP_400_BAD_REQUEST)
+                return json_response(UPDATED_BODY, status.HTTP_200_OK)
+            return json_response(NO_USER_BODY, status.HTTP_400_BAD_REQUEST)
+        return json_response(NOT_ALLOWED_BODY, status.HTTP_403_FORBIDDEN)
 
 
 class GetIdResource(Resource):
@@ -276,20 +295,16 @@ class GetIdResource(Resource):
     """
     def get(self):
         """Get method"""
-        try:
-            access_token = session[AUTH_TOKEN_KEY]
-        except KeyError as err:
-            APP.logger.error(err.args)
-            response_obj = {
-                'error': 'Provide a valid auth token.'
-            }
-            return response_obj, status.HTTP_401_UNAUTHORIZED
-        user_info = decode_token(access_token)
+        access_token = session_token()
+        if access_token is None:
+            APP.logger.error('No valid auth token in session.')
+            return json_response(NO_TOKEN_BODY, status.HTTP_401_UNAUTHORIZED)
+        user_info = decode_access_token(access_token)
         user_id = user_info['identity']
         response_obj = {
             'id': user_id
         }
-        return make_response(jsonify(response_obj), status.HTTP_200_OK)
+        return json_response(response_obj, status.HTTP_200_OK)
 
 API.add_resource(UsersResource, '/users')
 API.add_resource(RegisterResource, '/users/register')
@@ -4,20 +4,19 @@ import urllib.parse
 import requests
 from flask import (
     Blueprint,
-    jsonify,
     make_response,
     redirect,
     request
 )
 from flask_restful import Resource
+from flask_api import status
 from httplib2 import Http
 from flask_jwt_extended import create_access_token, decode_token
-from users_service import API
+from users_service import API, json_response
 from users_service.models.users import User
 from users_service.serializers.user_schema import UserSchema
 
-USER_SCHEMA = UserSchema(strict=True, exclude=['password', 'role_id', 'user_id',
-                                               'create_date', 'update_date'])
+USER_SCHEMA = UserSchema(strict=True, only=('email', 'first_name', 'last_name', 'google_id'))
 
 G_BLUEPRINT = Blueprint('g', __name__)
 
@@ -46,7 +45,7 @@ class GLoginResource(Resource):
                 client_id=client_id,
                 redirect_uri=REDIRECT_URL,
                 scope=scope)
-        response_obj = make_response(jsonify({'url':url}))
+        response_obj = json_response({'url':url}, status.HTTP_200_OK)
         if request.args.get('method') == 'login':
             url_to = REDIRECT_LOGIN
         elif request.args.get('method') == 'expand':
@@ -5,7 +5,7 @@ from flask_restful import Resource
 from sqlalchemy.exc import IntegrityError
 from flask_api import status
 from flask_mail import Message
-from users_service import API, APP, BCRYPT, MAIL
+from users_service import API, APP, MAIL
 from users_service.db import DB
 from users_service.models.users import User
 
@@ -39,7 +39,7 @@ class ResetPasswordResource(Resource):
             return response_obj, status.HTTP_400_BAD_REQUEST
 
         user_email = request.json.get("email")
-        user = User.query.filter_by(email=user_email).first()
+        user = User.get_by_email(user_email)
         if not user:
             response_obj = {
                 'error': 'No user with this email.'
@@ -67,9 +67,7 @@ class ResetPasswordResource(Resource):
                 'error': 'Invalid or expired token.'
             }
             return response_obj, status.HTTP_400_BAD_REQUEST
-        user.password = BCRYPT.generate_password_hash(
-            password, APP.config.get('BCRYPT_LOG_ROUNDS')
-        ).decode()
+        user.password = User.hash_password(password)
         user.update_date = datetime.datetime.now()
         try:
             DB.session.commit()